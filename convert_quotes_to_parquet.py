@@ -0,0 +1,19 @@
+import pandas as pd
+import os
+
+# One-shot conversion of the served dataset to a trimmed, zstd-compressed Parquet file
+csv_path = os.path.join('data', 'processed', 'all_archive_quotes_cleaned.csv')
+parquet_path = csv_path.replace('.csv', '.parquet')
+
+# Only the columns trained_api_server serves
+columns = ['quote', 'author', 'assigned_emotion', 'emotion']
+
+if not os.path.exists(csv_path):
+    print(f"[ERROR] File not found: {csv_path}")
+    exit(1)
+
+header = pd.read_csv(csv_path, nrows=0).columns
+quotes = pd.read_csv(csv_path, usecols=[col for col in columns if col in header],
+                     engine='pyarrow', dtype_backend='pyarrow')
+quotes.to_parquet(parquet_path, compression='zstd', index=False)
+print(f"Converted {len(quotes)} quotes ({', '.join(quotes.columns)}) to {parquet_path}")
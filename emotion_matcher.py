@@ -0,0 +1,172 @@
+"""
+Shared emotion keyword matcher
+Compiles EMOTION_KEYWORDS once at import. classify labels text by the first
+matching emotion in priority order; KeywordMatcher tallies keyword hits per emotion
+and flags named context vocabularies in the same pass
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Emotion keyword mapping, highest priority first
+EMOTION_KEYWORDS = {
+    'grief': ['grief', 'loss', 'death', 'died', 'lost', 'mourning', 'bereavement', 'sadness', 'pain', 'hurt', 'broken', 'alone', 'lonely', 'empty'],
+    'depression': ['depressed', 'sad', 'hopeless', 'despair', 'tired', 'exhausted', 'broken', 'hurt', 'pain', 'suffering', 'dark', 'empty', 'numb'],
+    'anxiety': ['anxious', 'worry', 'fear', 'scared', 'panic', 'stress', 'overwhelmed', 'nervous', 'restless'],
+    'motivation': ['motivated', 'motivate', 'drive', 'energy', 'work', 'career', 'goal', 'achieve', 'success', 'inspire', 'dream', 'aspire'],
+    'resilience': ['failure', 'fail', 'challenge', 'difficult', 'hard', 'struggle', 'overcome', 'persevere', 'tough', 'strength', 'courage'],
+    'mindfulness': ['mind', 'think', 'thought', 'calm', 'peace', 'meditation', 'present', 'breathe', 'breath'],
+    'happiness': ['happy', 'happiness', 'joy', 'cheer', 'bright', 'smile', 'laugh', 'delight', 'pleasure'],
+    'love': ['love', 'heart', 'relationship', 'romance', 'affection', 'care', 'cherish', 'adore'],
+    'wisdom': ['wisdom', 'learn', 'knowledge', 'experience', 'understand', 'insight', 'truth', 'philosophy'],
+    'hope': ['hope', 'faith', 'believe', 'trust', 'optimism', 'positive', 'future', 'better', 'light', 'heal']
+}
+
+EMOTIONS = list(EMOTION_KEYWORDS)
+
+# One compiled alternation per emotion, in EMOTION_KEYWORDS priority order
+EMOTION_PATTERNS = {
+    emotion: re.compile('|'.join(re.escape(kw) for kw in keywords))
+    for emotion, keywords in EMOTION_KEYWORDS.items()
+}
+
+# Keywords shared by several emotions keep the highest-priority one
+_KEYWORD_PRIORITY = {}
+for _priority, _keywords in enumerate(EMOTION_KEYWORDS.values()):
+    for _kw in _keywords:
+        _KEYWORD_PRIORITY.setdefault(_kw, _priority)
+
+# Every emotion that lists a keyword, as priority indexes, for tallies
+_KEYWORD_EMOTIONS = {}
+for _priority, _keywords in enumerate(EMOTION_KEYWORDS.values()):
+    for _kw in _keywords:
+        _KEYWORD_EMOTIONS.setdefault(_kw, []).append(_priority)
+
+_WORD_RE = re.compile(r'\w+')
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+def _build_automaton():
+    """Single Aho-Corasick automaton mapping every keyword to (priority, emotion)"""
+    automaton = ahocorasick.Automaton()
+    for kw, priority in _KEYWORD_PRIORITY.items():
+        automaton.add_word(kw, (priority, EMOTIONS[priority]))
+    automaton.make_automaton()
+    return automaton
+
+_AUTOMATON = _build_automaton() if ahocorasick else None
+
+def _classify_lower(text):
+    """Classify already-lowercased text"""
+    if _AUTOMATON is not None:
+        # One linear pass, keeping the lowest-priority-index match
+        return min((match for _, match in _AUTOMATON.iter(text)), default=(None, 'general'))[1]
+    for emotion, pattern in EMOTION_PATTERNS.items():
+        if pattern.search(text):
+            return emotion
+    return 'general'
+
+def classify(text, tags=''):
+    """Return the first emotion in EMOTION_KEYWORDS whose keywords appear in text or tags"""
+    return _classify_lower(f"{text} {tags or ''}".lower())
+
+def classify_batch(texts, tags=None):
+    """Vectorized classify over a Series of texts (and optional tags); returns an object ndarray"""
+    combined = pd.Series(texts).fillna('').astype(str).str.lower()
+    if tags is not None:
+        combined = combined + ' ' + pd.Series(tags).fillna('').astype(str).str.lower()
+    if _AUTOMATON is not None:
+        return np.array([_classify_lower(text) for text in combined], dtype=object)
+    emotions = np.full(len(combined), 'general', dtype=object)
+    # Walk in reverse priority so higher-priority emotions overwrite lower ones
+    for emotion, pattern in reversed(list(EMOTION_PATTERNS.items())):
+        mask = combined.str.contains(pattern, regex=True, na=False).to_numpy()
+        emotions[mask] = emotion
+    return emotions
+
+def _tally_words(best_by_word):
+    """int32 tally crediting each word's emotions once, from {word start: (keyword length, priorities)}"""
+    tally = np.zeros(len(EMOTIONS), dtype=np.int32)
+    for _, priorities in best_by_word.values():
+        for priority in priorities:
+            tally[priority] += 1
+    return tally
+
+def _keep_longest(best_by_word, word_start, kw):
+    """Record kw for the word at word_start unless a longer keyword already matched it"""
+    best = best_by_word.get(word_start)
+    if best is None or len(kw) > best[0]:
+        best_by_word[word_start] = (len(kw), set(_KEYWORD_EMOTIONS[kw]))
+    elif len(kw) == best[0]:
+        best[1].update(_KEYWORD_EMOTIONS[kw])
+
+def top_emotion(tally):
+    """Emotion with the most keyword hits, ties going to the higher priority; 'general' if none"""
+    return EMOTIONS[int(tally.argmax())] if tally.any() else 'general'
+
+def _score_words(text):
+    """Tally keywords that start or end a word of already-lowercased text, longest keyword per word"""
+    best_by_word = {}
+    for word in _WORD_RE.finditer(text):
+        for kw in _KEYWORD_EMOTIONS:
+            if word.group().startswith(kw) or word.group().endswith(kw):
+                _keep_longest(best_by_word, word.start(), kw)
+    return _tally_words(best_by_word)
+
+class KeywordMatcher:
+    """One pass over text tallying emotion keywords and flagging named context vocabularies
+
+    An emotion keyword counts where it starts or ends a word, so inflections and
+    compounds ('failing', 'heartbroken') match; each word credits only its longest
+    keyword ('hopeless' is not also hope), for every emotion listing it.
+    """
+
+    def __init__(self, contexts):
+        self.contexts = {name: list(keywords) for name, keywords in contexts.items()}
+        self._context_patterns = {
+            name: re.compile('|'.join(map(re.escape, keywords)))
+            for name, keywords in self.contexts.items()
+        }
+        self._automaton = self._build_automaton() if ahocorasick else None
+
+    def _build_automaton(self):
+        """Automaton mapping each emotion and context keyword to (keyword, is emotion keyword, context names)"""
+        names_by_keyword = {kw: set() for kw in _KEYWORD_EMOTIONS}
+        for name, keywords in self.contexts.items():
+            for kw in keywords:
+                names_by_keyword.setdefault(kw, set()).add(name)
+        automaton = ahocorasick.Automaton()
+        for kw, names in names_by_keyword.items():
+            automaton.add_word(kw, (kw, kw in _KEYWORD_EMOTIONS, frozenset(names)))
+        automaton.make_automaton()
+        return automaton
+
+    def analyze(self, text):
+        """(emotion tally in EMOTION_KEYWORDS order, set of context names whose keywords appear in text);
+        text must already be lowercased"""
+        if self._automaton is None:
+            matched = {name for name, pattern in self._context_patterns.items() if pattern.search(text)}
+            return _score_words(text), matched
+        # Context phrases ('broken heart', 'ex ') match as substrings; emotion
+        # keywords only where they start or end a word, as in _score_words
+        best_by_word = {}
+        matched = set()
+        for end, (kw, is_emotion, names) in self._automaton.iter(text):
+            matched.update(names)
+            if not is_emotion:
+                continue
+            start = end - len(kw) + 1
+            word_start = start
+            while word_start > 0 and _is_word_char(text[word_start - 1]):
+                word_start -= 1
+            if word_start == start or end + 1 == len(text) or not _is_word_char(text[end + 1]):
+                _keep_longest(best_by_word, word_start, kw)
+        return _tally_words(best_by_word), matched
@@ -0,0 +1,26 @@
+"""
+Gunicorn settings for the WiseAI API server
+
+    gunicorn -c gunicorn_conf.py
+
+preload_app imports wsgi.py (which loads the quotes) once in the master, so
+forked workers share the dataset copy-on-write. post_fork reseeds the
+sampling RNG in each worker, which would otherwise inherit the master's state
+and serve identical quote sequences. Switch worker_class to 'gevent'
+(pip install gevent) to trade threads for greenlets.
+"""
+
+import os
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('WISEAI_BIND', '0.0.0.0:5008')
+workers = int(os.environ.get('WISEAI_WORKERS', os.cpu_count() or 1))
+worker_class = 'gthread'
+threads = 8
+preload_app = True
+
+
+def post_fork(server, worker):
+    import numpy as np
+    from trained_api_server import trained_engine
+    trained_engine._rng = np.random.default_rng()
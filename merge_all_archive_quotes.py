@@ -1,34 +1,9 @@
 import pandas as pd
+import pyarrow as pa
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-# Helper to count words
-def word_count(text):
-    if pd.isna(text) or not isinstance(text, str):
-        return 0
-    return len(text.split())
-
-# Emotion keyword mapping
-EMOTION_KEYWORDS = {
-    'grief': ['grief', 'loss', 'death', 'died', 'lost', 'mourning', 'bereavement', 'sadness', 'pain', 'hurt', 'broken', 'alone', 'lonely', 'empty'],
-    'depression': ['depressed', 'sad', 'hopeless', 'despair', 'tired', 'exhausted', 'broken', 'hurt', 'pain', 'suffering', 'dark', 'empty', 'numb'],
-    'anxiety': ['anxious', 'worry', 'fear', 'scared', 'panic', 'stress', 'overwhelmed', 'nervous', 'restless'],
-    'motivation': ['motivated', 'motivate', 'drive', 'energy', 'work', 'career', 'goal', 'achieve', 'success', 'inspire', 'dream', 'aspire'],
-    'resilience': ['failure', 'fail', 'challenge', 'difficult', 'hard', 'struggle', 'overcome', 'persevere', 'tough', 'strength', 'courage'],
-    'mindfulness': ['mind', 'think', 'thought', 'calm', 'peace', 'meditation', 'present', 'breathe', 'breath'],
-    'happiness': ['happy', 'happiness', 'joy', 'cheer', 'bright', 'smile', 'laugh', 'delight', 'pleasure'],
-    'love': ['love', 'heart', 'relationship', 'romance', 'affection', 'care', 'cherish', 'adore'],
-    'wisdom': ['wisdom', 'learn', 'knowledge', 'experience', 'understand', 'insight', 'truth', 'philosophy'],
-    'hope': ['hope', 'faith', 'believe', 'trust', 'optimism', 'positive', 'future', 'better', 'light', 'heal']
-}
-
-def assign_emotion(text, tags=None):
-    text = str(text).lower()
-    tags = str(tags).lower() if tags else ''
-    for emotion, keywords in EMOTION_KEYWORDS.items():
-        for kw in keywords:
-            if kw in text or kw in tags:
-                return emotion
-    return 'general'
+from emotion_matcher import classify_batch
 
 # Paths to archive files
 data_dir = os.path.join('Everyone_can_code', 'data', 'processed', 'archive')
@@ -39,29 +14,32 @@ files = [
     'Scraping_done.csv',
 ]
 
-# Load and normalize all files
-dfs = []
-for fname in files:
+# Multithreaded Arrow CSV reader; keeps string columns Arrow-backed
+CSV_READ_OPTIONS = {'engine': 'pyarrow', 'dtype_backend': 'pyarrow'}
+
+def load_quotes(fname):
+    """Load one archive file and normalize it to quote/author/tags; None if skipped"""
     fpath = os.path.join(data_dir, fname)
     if not os.path.exists(fpath):
         print(f"[SKIP] File not found: {fname}")
-        continue
+        return None
     if fname == 'quotes.csv':
-        df = pd.read_csv(fpath, usecols=['quote','author','category'])
+        df = pd.read_csv(fpath, usecols=['quote','author','category'],
+                         dtype={'quote': 'string', 'author': 'string', 'category': 'string'}, **CSV_READ_OPTIONS)
         df = df.rename(columns={'category':'tags'})
     elif fname == 'stoic_quotes_full.csv':
-        df = pd.read_csv(fpath)
+        df = pd.read_csv(fpath, **CSV_READ_OPTIONS)
         df = df.rename(columns={'Quote':'quote','Author':'author','Tags':'tags'})
     elif fname == 'lessreal-data.csv':
-        df = pd.read_csv(fpath, sep=';')
+        df = pd.read_csv(fpath, sep=';', **CSV_READ_OPTIONS)
         if 'Character' in df.columns and 'Quote' in df.columns:
             df = df[['Character', 'Quote']].rename(columns={'Character': 'author', 'Quote': 'quote'})
             df['tags'] = ''
         else:
             print(f"[SKIP] Missing columns in {fname}")
-            continue
+            return None
     elif fname == 'Scraping_done.csv':
-        df = pd.read_csv(fpath)
+        df = pd.read_csv(fpath, **CSV_READ_OPTIONS)
         if 'quotes' in df.columns:
             df = df.rename(columns={'quotes':'quote','authors':'author'})
             if 'Unnamed: 0' in df.columns:
@@ -71,34 +49,50 @@ for fname in files:
         if 'tags' not in df.columns:
             df['tags'] = ''
     else:
-        continue
+        return None
     df = df.dropna(subset=['quote'])
     # Ensure required columns
     if not all(col in df.columns for col in ['quote','author','tags']):
         print(f"[SKIP] After processing, missing columns in {fname}: {df.columns}")
-        continue
-    if not df.empty:
-        dfs.append(df[['quote','author','tags']])
-        print(f"[OK] Loaded {len(df)} quotes from {fname}")
-    else:
+        return None
+    if df.empty:
         print(f"[SKIP] No data in {fname}")
+        return None
+    return df[['quote','author','tags']]
+
+# Load and normalize all files concurrently; CSV parsing releases the GIL
+with ThreadPoolExecutor(max_workers=len(files)) as executor:
+    loaded = list(executor.map(load_quotes, files))
+
+tables = []
+for fname, df in zip(files, loaded):
+    if df is not None:
+        tables.append(pa.Table.from_pandas(df, preserve_index=False))
+        print(f"[OK] Loaded {len(df)} quotes from {fname}")
 
 # Merge all
-if not dfs:
+if not tables:
     print("[ERROR] No dataframes to concatenate! Exiting.")
     exit(1)
-all_quotes = pd.concat(dfs, ignore_index=True)
+# Arrow concatenation chains the column chunks instead of copying them
+all_quotes = pa.concat_tables(tables, promote_options='permissive').to_pandas(types_mapper=pd.ArrowDtype)
 
-# Remove duplicates
-all_quotes = all_quotes.drop_duplicates(subset=['quote'])
+# Remove duplicates on a 64-bit hash of the quote instead of full-string compares
+quote_hash = pd.util.hash_pandas_object(all_quotes['quote'], index=False)
+all_quotes = all_quotes[~quote_hash.duplicated().to_numpy()]
 
-# Filter by length (65 words or less)
-all_quotes = all_quotes[all_quotes['quote'].apply(word_count) <= 65]
+# Filter by length (65 words or less); str.split() also splits on Unicode whitespace
+# such as \xa0, which Arrow's RE2 \s does not match
+word_counts = all_quotes['quote'].fillna('').map(lambda text: len(text.split()))
+all_quotes = all_quotes[word_counts.to_numpy() <= 65]
 
 # Assign emotion
-all_quotes['emotion'] = all_quotes.apply(lambda row: assign_emotion(row['quote'], row['tags']), axis=1)
+all_quotes['emotion'] = classify_batch(all_quotes['quote'], all_quotes['tags'])
 
 # Save cleaned dataset
 output_path = os.path.join('Everyone_can_code', 'data', 'processed', 'all_archive_quotes_cleaned.csv')
 all_quotes.to_csv(output_path, index=False)
-print(f"Merged and cleaned dataset saved to {output_path}. Total quotes: {len(all_quotes)}") 
\ No newline at end of file
+# Columnar copy for downstream readers; avoids re-parsing the CSV
+parquet_path = output_path.replace('.csv', '.parquet')
+all_quotes.to_parquet(parquet_path, compression='snappy', index=False)
+print(f"Merged and cleaned dataset saved to {output_path} and {parquet_path}. Total quotes: {len(all_quotes)}") 
\ No newline at end of file
@@ -6,234 +6,396 @@ Uses machine learning models to provide better quote recommendations
 
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 from sklearn.metrics.pairwise import cosine_similarity
 import pickle
 import json
 import logging
+import re
+import threading
+from functools import lru_cache
 from datetime import datetime
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from emotion_matcher import EMOTION_KEYWORDS, EMOTIONS, KeywordMatcher, top_emotion
+
+# User-input context keywords that narrow the candidate quotes
+BREAKUP_KEYWORDS = [
+    'breakup', 'break up', 'broken heart', 'lost love', 'separation', 'divorce', 'unrequited', 'rejected',
+    'ex-', 'ex ', 'move on', 'heartbreak', 'left me', 'cheated', 'another person', 'dumped', 'relationship ended'
+]
+BURNOUT_INPUT_KEYWORDS = ['burnout', 'burnt out', 'study', 'school', 'exam', 'university', 'class', 'homework', 'assignment', 'test', 'grades', 'college', 'education', 'teacher', 'student']
+
+# Quote relevance filters: a quote qualifies when it contains a keyword from each group
+RELEVANCE_KEYWORDS = {
+    'grief': (
+        ['death', 'died', 'loss', 'lost', 'grief', 'mourning', 'bereavement'],
+        ['mother', 'father', 'mom', 'dad', 'parent', 'friend', 'sister', 'brother', 'loved one', 'husband', 'wife', 'child', 'son', 'daughter'],
+    ),
+    'love': (
+        ['love', 'heart', 'romance', 'affection', 'cherish', 'adore', 'relationship'],
+        ['breakup', 'break up', 'broken heart', 'lost love', 'separation', 'divorce', 'unrequited', 'rejected', 'ex-', 'ex '],
+    ),
+    'breakup': (
+        ['love', 'heart', 'romance', 'affection', 'cherish', 'adore', 'relationship'],
+        BREAKUP_KEYWORDS,
+    ),
+    'loneliness': (
+        ['lonely', 'alone', 'isolation', 'solitude', 'abandoned', 'left out', 'friendless', 'nobody', 'by myself'],
+        ['sad', 'depressed', 'hopeless', 'empty', 'cry', 'pain', 'hurt'],
+    ),
+    'failure': (
+        ['fail', 'failure', 'mistake', 'lost', 'defeat', 'give up', 'quit', 'setback', 'disappoint'],
+        ['learn', 'growth', 'try', 'improve', 'overcome', 'persevere', 'resilience', 'bounce back'],
+    ),
+    'motivation': (
+        ['motivate', 'motivation', 'inspire', 'drive', 'goal', 'achieve', 'success', 'dream', 'aspire', 'ambition'],
+        ['action', 'work', 'do', 'start', 'begin', 'move', 'push', 'progress', 'step', 'effort'],
+    ),
+    'happiness': (
+        ['happy', 'happiness', 'joy', 'cheer', 'smile', 'delight', 'pleasure', 'content', 'enjoy'],
+        ['life', 'living', 'moment', 'present', 'now', 'enjoy', 'grateful', 'gratitude'],
+    ),
+    'anxiety': (
+        ['anxious', 'anxiety', 'panic', 'worry', 'worried', 'nervous', 'restless'],
+        ['stress', 'fear', 'afraid', 'overwhelmed', 'scared', 'pressure'],
+    ),
+    'depression': (
+        ['depressed', 'depression', 'hopeless', 'despair', 'numb', 'empty', 'worthless', 'tired', 'exhausted'],
+        ['hopeless', 'meaningless', 'pointless', 'empty', 'alone', 'dark', 'lost', 'nothing matters'],
+    ),
+    'burnout': (
+        ['burnout', 'burnt out', 'tired', 'exhausted', 'overwhelmed', 'hopeless', 'gave up', 'no power', "can't continue", 'fatigued', 'drained'],
+        ['school', 'study', 'studying', 'exam', 'university', 'class', 'homework', 'assignment', 'test', 'grades', 'college', 'education', 'teacher', 'student'],
+    ),
+}
+# One compiled alternation per keyword group; Arrow string columns take the .pattern source
+RELEVANCE_PATTERNS = {
+    name: tuple(re.compile('|'.join(map(re.escape, group))) for group in groups)
+    for name, groups in RELEVANCE_KEYWORDS.items()
+}
+BREAKUP_RE = re.compile('|'.join(map(re.escape, BREAKUP_KEYWORDS)))
+# Emotion and context keywords matched together in one pass over the user input
+INPUT_MATCHER = KeywordMatcher({'breakup': BREAKUP_KEYWORDS, 'burnout': BURNOUT_INPUT_KEYWORDS})
+
+# Longer inputs skip the memo so the cache never pins large request bodies
+MAX_CACHED_INPUT_LENGTH = 1000
+
+def _analyze_text(text):
+    """INPUT_MATCHER pass over lowercased text; the tally is read-only since the memo shares it"""
+    tally, contexts = INPUT_MATCHER.analyze(text)
+    tally.setflags(write=False)
+    return top_emotion(tally), 'breakup' in contexts, 'burnout' in contexts, tally
+
+_analyze_cached = lru_cache(maxsize=4096)(_analyze_text)
+# Relevance filter applied to each detected emotion (love is handled separately)
+EMOTION_RELEVANCE_FILTERS = {
+    'grief': 'grief',
+    'anxiety': 'anxiety',
+    'depression': 'depression',
+    'happiness': 'happiness',
+    'motivation': 'motivation',
+    'resilience': 'failure',
+    'mindfulness': 'loneliness',
+}
+
+# Dataset columns the API reads; everything else is dropped at load
+SERVED_COLUMNS = ('quote', 'author', 'assigned_emotion', 'emotion')
+# Largest texts list accepted by /recommendations/batch
+MAX_BATCH_SIZE = 100
+# Request bodies above this are rejected with 413 before any parsing
+MAX_REQUEST_BYTES = 256 * 1024
+# Insight returned with every recommendation response
+DEFAULT_INSIGHT = "I understand what you're going through. You're not alone in this journey."
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, falling back to the stdlib encoder"""
+
+    @staticmethod
+    def default(o):
+        # numpy values for the stdlib path; orjson serializes them natively
+        if isinstance(o, (np.ndarray, np.generic)):
+            return o.tolist()
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
 CORS(app)
 
 class TrainedQuoteEngine:
     def __init__(self, models_dir='models'):
         self.models_dir = models_dir
-        self.quotes_df = None
+        self._quotes_df = None
         self.is_loaded = False
-        self.emotion_keywords = {
-            'grief': ['grief', 'loss', 'death', 'died', 'lost', 'mourning', 'bereavement', 'sadness', 'pain', 'hurt', 'broken', 'alone', 'lonely', 'empty'],
-            'depression': ['depressed', 'sad', 'hopeless', 'despair', 'tired', 'exhausted', 'broken', 'hurt', 'pain', 'suffering', 'dark', 'empty', 'numb'],
-            'anxiety': ['anxious', 'worry', 'fear', 'scared', 'panic', 'stress', 'overwhelmed', 'nervous', 'restless'],
-            'motivation': ['motivated', 'motivate', 'drive', 'energy', 'work', 'career', 'goal', 'achieve', 'success', 'inspire', 'dream', 'aspire'],
-            'resilience': ['failure', 'fail', 'challenge', 'difficult', 'hard', 'struggle', 'overcome', 'persevere', 'tough', 'strength', 'courage'],
-            'mindfulness': ['mind', 'think', 'thought', 'calm', 'peace', 'meditation', 'present', 'breathe', 'breath'],
-            'happiness': ['happy', 'happiness', 'joy', 'cheer', 'bright', 'smile', 'laugh', 'delight', 'pleasure'],
-            'love': ['love', 'heart', 'relationship', 'romance', 'affection', 'care', 'cherish', 'adore'],
-            'wisdom': ['wisdom', 'learn', 'knowledge', 'experience', 'understand', 'insight', 'truth', 'philosophy'],
-            'hope': ['hope', 'faith', 'believe', 'trust', 'optimism', 'positive', 'future', 'better', 'light', 'heal']
-        }
+        self._load_lock = threading.Lock()
+        self._load_attempted = False
+        self._emotion_col = None
+        self._emotion_index = {}
+        self._rng = np.random.default_rng()
+        self._candidates = {}
+        self._emotion_counts = {}
+        # Struct-of-arrays copies of the served columns, filled by load_models
+        self._texts = np.empty(0, dtype=object)
+        self._authors = np.empty(0, dtype=object)
+        self._emotions = np.empty(0, dtype=object)
+        self._word_counts = np.empty(0, dtype=np.int32)
+        self.emotion_keywords = EMOTION_KEYWORDS
         self.emotions = list(self.emotion_keywords.keys())
         self.metadata = None
         
+    @property
+    def quotes_df(self):
+        """Quote table, loaded on first access"""
+        self.ensure_loaded()
+        return self._quotes_df
+
+    def ensure_loaded(self) -> bool:
+        """Load and warm up the engine once, however many threads ask; returns is_loaded"""
+        if self._load_attempted:
+            return self.is_loaded
+        with self._load_lock:
+            if not self._load_attempted:
+                loaded = self.load_models()
+                self._load_attempted = True
+                if loaded:
+                    logger.info(f"✅ Trained models loaded successfully: {len(self._quotes_df)} quotes, {len(self.emotions)} emotion classes")
+                    self._warmup()
+                else:
+                    logger.warning("⚠️ Could not load trained models, using fallback mode")
+        return self.is_loaded
+
     def load_models(self):
         """Load trained models"""
         try:
             import pandas as pd, os
-            # Load merged and cleaned archive CSV
+            # Load merged and cleaned archive dataset, preferring the Parquet copy
             all_quotes_path = os.path.join('data', 'processed', 'all_archive_quotes_cleaned.csv')
-            if os.path.exists(all_quotes_path):
-                self.quotes_df = pd.read_csv(all_quotes_path)
-                self.is_loaded = True
+            parquet_path = all_quotes_path.replace('.csv', '.parquet')
+            csv_mtime = os.path.getmtime(all_quotes_path) if os.path.exists(all_quotes_path) else None
+            # A Parquet copy older than the CSV is stale; reconvert to use it again
+            parquet_fresh = os.path.exists(parquet_path) and (csv_mtime is None or os.path.getmtime(parquet_path) >= csv_mtime)
+            # Arrow-backed columns keep the string scans below in C over UTF-8 buffers
+            if parquet_fresh:
+                source_path = parquet_path
+                available = pq.read_schema(parquet_path).names
+                self._quotes_df = pd.read_parquet(parquet_path, columns=[col for col in SERVED_COLUMNS if col in available],
+                                                 dtype_backend='pyarrow')
+            elif csv_mtime is not None:
+                source_path = all_quotes_path
+                # The pyarrow engine needs usecols as a list, so read the header first
+                header = pd.read_csv(all_quotes_path, nrows=0).columns
+                self._quotes_df = pd.read_csv(all_quotes_path, usecols=[col for col in SERVED_COLUMNS if col in header],
+                                             engine='pyarrow', dtype_backend='pyarrow')
             else:
-                self.quotes_df = None
+                self._quotes_df = None
                 self.is_loaded = False
+                return self.is_loaded
+            logger.info(f"📂 Loading quotes from {source_path}")
+            # Keep only the columns the API serves; positions double as row labels below
+            self._quotes_df = self._quotes_df[[col for col in SERVED_COLUMNS if col in self._quotes_df.columns]]
+            # Arrow columns carry nulls as pd.NA, which is not JSON serializable
+            self._quotes_df = self._quotes_df.dropna(subset=['quote']).reset_index(drop=True)
+            if 'author' in self._quotes_df.columns:
+                self._quotes_df['author'] = self._quotes_df['author'].fillna('Unknown')
+            # Lowercase once so keyword filters don't redo it per request
+            self._quotes_df['_quote_lower'] = self._quotes_df['quote'].str.lower()
+            # str.split() also splits on Unicode whitespace such as \xa0, which Arrow's RE2 \s does not
+            self._quotes_df['_word_count'] = self._quotes_df['_quote_lower'].map(lambda text: len(text.split())).astype(np.int32)
+            # Low-cardinality label columns: store as integer codes, not repeated strings
+            for col in ('assigned_emotion', 'emotion'):
+                if col in self._quotes_df.columns:
+                    self._quotes_df[col] = self._quotes_df[col].astype('category')
+            # Resolve the label column once and cache its lowercased form
+            self._emotion_col = 'assigned_emotion' if 'assigned_emotion' in self._quotes_df.columns else 'emotion'
+            self._quotes_df['_emotion_lower'] = self._quotes_df[self._emotion_col].astype(str).str.lower().astype('category')
+            # Map each lowercased emotion to its row positions for O(1) lookup per request
+            self._emotion_index = self._quotes_df.groupby('_emotion_lower', observed=True).indices
+            # Static per-emotion quote counts for /emotions
+            self._emotion_counts = {emotion: len(idx) for emotion, idx in self._emotion_index.items()}
+            self._candidates = self._build_candidates()
+            # Plain object/int arrays so responses are built without pandas indexing
+            n_quotes = len(self._quotes_df)
+            self._texts = self._quotes_df['quote'].to_numpy(dtype=object, na_value=None)
+            # The iOS client decodes author and emotion as non-optional strings
+            if 'author' in self._quotes_df.columns:
+                self._authors = self._quotes_df['author'].to_numpy(dtype=object, na_value='Unknown')
+            else:
+                self._authors = np.full(n_quotes, 'Unknown', dtype=object)
+            self._emotions = self._quotes_df[self._emotion_col].to_numpy(dtype=object, na_value='general')
+            self._word_counts = self._quotes_df['_word_count'].to_numpy()
+            self.is_loaded = True
             return self.is_loaded
         except Exception as e:
+            logger.exception(f"❌ Error loading quotes: {e}")
             self.is_loaded = False
             return False
     
+    def analyze_input(self, user_input: str) -> tuple:
+        """(emotion, is_breakup, is_burnout, tally) from a single pass over the input"""
+        # Matching is case-insensitive, so lowercasing first lets variants share a cache entry
+        text = user_input.lower()
+        if len(text) > MAX_CACHED_INPUT_LENGTH:
+            return _analyze_text(text)
+        return _analyze_cached(text)
+
     def detect_emotion(self, user_input: str) -> str:
         """Analyze user input using trained emotion classifier"""
-        user_input_lower = user_input.lower()
-        for emotion, keywords in self.emotion_keywords.items():
-            for kw in keywords:
-                if kw in user_input_lower:
-                    return emotion
-        return 'general'
-    
-    def is_relevant_grief_quote(self, quote):
-        text = str(quote).lower()
-        grief_keywords = ['death', 'died', 'loss', 'lost', 'grief', 'mourning', 'bereavement']
-        relationship_keywords = ['mother', 'father', 'mom', 'dad', 'parent', 'friend', 'sister', 'brother', 'loved one', 'husband', 'wife', 'child', 'son', 'daughter']
-        return (any(gk in text for gk in grief_keywords) and any(rk in text for rk in relationship_keywords))
-
-    def is_relevant_love_quote(self, quote):
-        text = str(quote).lower()
-        love_keywords = ['love', 'heart', 'romance', 'affection', 'cherish', 'adore', 'relationship']
-        breakup_keywords = ['breakup', 'break up', 'broken heart', 'lost love', 'separation', 'divorce', 'unrequited', 'rejected', 'ex-', 'ex ']
-        return (any(lk in text for lk in love_keywords) and any(bk in text for bk in breakup_keywords))
-
-    def is_relevant_loneliness_quote(self, quote):
-        text = str(quote).lower()
-        loneliness_keywords = ['lonely', 'alone', 'isolation', 'solitude', 'abandoned', 'left out', 'friendless', 'nobody', 'by myself']
-        sadness_keywords = ['sad', 'depressed', 'hopeless', 'empty', 'cry', 'pain', 'hurt']
-        return (any(lk in text for lk in loneliness_keywords) and any(sk in text for sk in sadness_keywords))
-
-    def is_relevant_failure_quote(self, quote):
-        text = str(quote).lower()
-        failure_keywords = ['fail', 'failure', 'mistake', 'lost', 'defeat', 'give up', 'quit', 'setback', 'disappoint']
-        growth_keywords = ['learn', 'growth', 'try', 'improve', 'overcome', 'persevere', 'resilience', 'bounce back']
-        return (any(fk in text for fk in failure_keywords) and any(gk in text for gk in growth_keywords))
-
-    def is_relevant_motivation_quote(self, quote):
-        text = str(quote).lower()
-        motivation_keywords = ['motivate', 'motivation', 'inspire', 'drive', 'goal', 'achieve', 'success', 'dream', 'aspire', 'ambition']
-        action_keywords = ['action', 'work', 'do', 'start', 'begin', 'move', 'push', 'progress', 'step', 'effort']
-        return (any(mk in text for mk in motivation_keywords) and any(ak in text for ak in action_keywords))
-
-    def is_relevant_happiness_quote(self, quote):
-        text = str(quote).lower()
-        happiness_keywords = ['happy', 'happiness', 'joy', 'cheer', 'smile', 'delight', 'pleasure', 'content', 'enjoy']
-        life_keywords = ['life', 'living', 'moment', 'present', 'now', 'enjoy', 'grateful', 'gratitude']
-        return (any(hk in text for hk in happiness_keywords) and any(lk in text for lk in life_keywords))
-
-    def is_relevant_anxiety_quote(self, quote):
-        text = str(quote).lower()
-        anxiety_keywords = ['anxious', 'anxiety', 'panic', 'worry', 'worried', 'nervous', 'restless']
-        stress_keywords = ['stress', 'fear', 'afraid', 'overwhelmed', 'scared', 'pressure']
-        return (any(ak in text for ak in anxiety_keywords) and any(sk in text for sk in stress_keywords))
-
-    def is_relevant_depression_quote(self, quote):
-        text = str(quote).lower()
-        depression_keywords = ['depressed', 'depression', 'hopeless', 'despair', 'numb', 'empty', 'worthless', 'tired', 'exhausted']
-        hopelessness_keywords = ['hopeless', 'meaningless', 'pointless', 'empty', 'alone', 'dark', 'lost', 'nothing matters']
-        return (any(dk in text for dk in depression_keywords) and any(hk in text for hk in hopelessness_keywords))
+        return self.analyze_input(user_input)[0]
+
+    def score_emotion(self, user_input: str, analysis: tuple = None) -> tuple:
+        """(emotion, confidence, probabilities) from the keyword hit tally"""
+        emotion, _, _, tally = analysis or self.analyze_input(user_input)
+        total = int(tally.sum())
+        if total == 0:
+            return 'general', 0.0, {}
+        # One vectorized division; tolist() converts the shares in a single call
+        shares = np.round(tally / total, 4).tolist()
+        probabilities = {name: share for name, share in zip(EMOTIONS, shares) if share}
+        return emotion, max(shares), probabilities
     
-    def is_relevant_burnout_quote(self, quote):
-        text = str(quote).lower()
-        burnout_keywords = ['burnout', 'burnt out', 'tired', 'exhausted', 'overwhelmed', 'hopeless', 'gave up', 'no power', "can't continue", 'fatigued', 'drained']
-        study_keywords = ['school', 'study', 'studying', 'exam', 'university', 'class', 'homework', 'assignment', 'test', 'grades', 'college', 'education', 'teacher', 'student']
-        return (any(bk in text for bk in burnout_keywords) and any(sk in text for sk in study_keywords))
-
-    def is_relevant_breakup_quote(self, quote):
-        text = str(quote).lower()
-        love_keywords = ['love', 'heart', 'romance', 'affection', 'cherish', 'adore', 'relationship']
-        breakup_keywords = [
-            'breakup', 'break up', 'broken heart', 'lost love', 'separation', 'divorce', 'unrequited', 'rejected',
-            'ex-', 'ex ', 'move on', 'heartbreak', 'left me', 'cheated', 'another person', 'dumped', 'relationship ended'
-        ]
-        return (any(lk in text for lk in love_keywords) and any(bk in text for bk in breakup_keywords))
-
-    def get_recommendations(self, user_input: str, top_k: int = 5) -> list:
+    def _relevance_mask(self, quotes_df, name: str) -> np.ndarray:
+        """Boolean mask of quotes containing a keyword from every group of the named filter"""
+        mask = np.ones(len(quotes_df), dtype=bool)
+        for pattern in RELEVANCE_PATTERNS[name]:
+            mask &= quotes_df['_quote_lower'].str.contains(pattern.pattern, regex=True, na=False).to_numpy()
+        return mask
+
+    def get_recommendations_batch(self, user_inputs, top_k: int = 5) -> list:
+        """(emotion, recommendations) per input, analyzing each input once"""
+        results = []
+        for user_input in user_inputs:
+            emotion, is_breakup, is_burnout, _ = self.analyze_input(user_input)
+            results.append((emotion, self._sample_recommendations(emotion, is_breakup, is_burnout, top_k)))
+        return results
+
+    def get_recommendations(self, user_input: str, top_k: int = 5, analysis: tuple = None) -> list:
         """Get personalized quote recommendations using simple training models"""
-        if not self.is_loaded or self.quotes_df is None:
+        emotion, is_breakup, is_burnout, _ = analysis or self.analyze_input(user_input)
+        return self._sample_recommendations(emotion, is_breakup, is_burnout, top_k)
+
+    def _sample_recommendations(self, emotion: str, is_breakup: bool, is_burnout: bool, top_k: int) -> list:
+        """Draw top_k quotes from the precomputed candidates for an emotion and input context"""
+        if not self.ensure_loaded() or self._quotes_df is None:
             return []
-        emotion = self.detect_emotion(user_input)
-        if 'assigned_emotion' in self.quotes_df.columns:
-            emotion_quotes = self.quotes_df[self.quotes_df['assigned_emotion'].str.lower() == emotion]
-        else:
-            emotion_quotes = self.quotes_df[self.quotes_df['emotion'].str.lower() == emotion]
-        if emotion_quotes.empty and emotion != 'general':
-            # fallback to general
-            if 'assigned_emotion' in self.quotes_df.columns:
-                emotion_quotes = self.quotes_df[self.quotes_df['assigned_emotion'].str.lower() == 'general']
-            else:
-                emotion_quotes = self.quotes_df[self.quotes_df['emotion'].str.lower() == 'general']
+        # Breakup context only narrows love quotes
+        is_breakup = is_breakup and emotion == 'love'
+        # Candidates are prefiltered at load; sample positions straight from the index array
+        candidates = self._candidates.get((emotion, is_breakup, is_burnout), np.empty(0, dtype=np.intp))
+        idx = self._rng.choice(candidates, size=min(top_k, candidates.size), replace=False)
+        return [{'text': text, 'author': author, 'emotion': emotion}
+                for text, author in zip(self._texts[idx], self._authors[idx])]
+
+    def sample_quotes(self, n: int = 100, max_words: int = 50) -> list:
+        """Up to n random quotes of max_words or less, built from the column arrays"""
+        if not self.ensure_loaded():
+            return []
+        idx = self._rng.choice(self._texts.size, size=min(n, self._texts.size), replace=False)
+        idx = idx[self._word_counts[idx] <= max_words]
+        return [{'text': text, 'author': author, 'emotion': emotion}
+                for text, author, emotion in zip(self._texts[idx], self._authors[idx], self._emotions[idx])]
+
+    def _build_candidates(self) -> dict:
+        """Filtered row positions, in index order, for every (emotion, is_breakup, is_burnout) a request can hit"""
+        candidates = {}
+        for emotion in self.emotions + ['general']:
+            for is_breakup in ((False, True) if emotion == 'love' else (False,)):
+                for is_burnout in (False, True):
+                    candidates[(emotion, is_breakup, is_burnout)] = self._filter_candidates(emotion, is_breakup, is_burnout)
+        return candidates
+
+    def _filter_candidates(self, emotion: str, is_breakup: bool, is_burnout: bool) -> np.ndarray:
+        """Relevance- and length-filter one emotion's quotes, returned as row positions in index order"""
+        # fallback to general when the emotion has no quotes
+        base_emotion = emotion if len(self._emotion_index.get(emotion, [])) else 'general'
+        emotion_quotes = self._quotes_df.iloc[self._emotion_index.get(base_emotion, [])]
         # Multi-keyword/context filtering for sensitive emotions
-        if emotion == 'grief':
-            emotion_quotes = emotion_quotes[emotion_quotes['quote'].apply(self.is_relevant_grief_quote)]
-        elif emotion == 'love':
+        if emotion == 'love':
             # Breakup context filter
-            breakup_keywords = [
-                'breakup', 'break up', 'broken heart', 'lost love', 'separation', 'divorce', 'unrequited', 'rejected',
-                'ex-', 'ex ', 'move on', 'heartbreak', 'left me', 'cheated', 'another person', 'dumped', 'relationship ended'
-            ]
-            if any(word in user_input.lower() for word in breakup_keywords):
-                filtered = emotion_quotes[emotion_quotes['quote'].apply(self.is_relevant_breakup_quote)]
+            if is_breakup:
+                filtered = emotion_quotes[self._relevance_mask(emotion_quotes, 'breakup')]
                 if not filtered.empty:
                     emotion_quotes = filtered
                 else:
                     # fallback: any quote with a breakup keyword
-                    emotion_quotes = emotion_quotes[emotion_quotes['quote'].str.lower().str.contains('|'.join(breakup_keywords))]
+                    emotion_quotes = emotion_quotes[emotion_quotes['_quote_lower'].str.contains(BREAKUP_RE.pattern, regex=True, na=False)]
             else:
-                emotion_quotes = emotion_quotes[emotion_quotes['quote'].apply(self.is_relevant_love_quote)]
-        elif emotion == 'anxiety':
-            emotion_quotes = emotion_quotes[emotion_quotes['quote'].apply(self.is_relevant_anxiety_quote)]
-        elif emotion == 'depression':
-            emotion_quotes = emotion_quotes[emotion_quotes['quote'].apply(self.is_relevant_depression_quote)]
-        elif emotion == 'happiness':
-            emotion_quotes = emotion_quotes[emotion_quotes['quote'].apply(self.is_relevant_happiness_quote)]
-        elif emotion == 'motivation':
-            emotion_quotes = emotion_quotes[emotion_quotes['quote'].apply(self.is_relevant_motivation_quote)]
-        elif emotion == 'resilience':
-            emotion_quotes = emotion_quotes[emotion_quotes['quote'].apply(self.is_relevant_failure_quote)]
-        elif emotion == 'mindfulness':
-            emotion_quotes = emotion_quotes[emotion_quotes['quote'].apply(self.is_relevant_loneliness_quote)]
+                emotion_quotes = emotion_quotes[self._relevance_mask(emotion_quotes, 'love')]
+        elif emotion in EMOTION_RELEVANCE_FILTERS:
+            emotion_quotes = emotion_quotes[self._relevance_mask(emotion_quotes, EMOTION_RELEVANCE_FILTERS[emotion])]
         # Burnout/study/school context filter
-        burnout_input_keywords = ['burnout', 'burnt out', 'study', 'school', 'exam', 'university', 'class', 'homework', 'assignment', 'test', 'grades', 'college', 'education', 'teacher', 'student']
-        if any(word in user_input.lower() for word in burnout_input_keywords):
-            emotion_quotes = emotion_quotes[emotion_quotes['quote'].apply(self.is_relevant_burnout_quote)]
+        if is_burnout:
+            emotion_quotes = emotion_quotes[self._relevance_mask(emotion_quotes, 'burnout')]
         # Filter by length
         emotion_quotes = self._filter_quotes_by_length(emotion_quotes)
-        if len(emotion_quotes) <= top_k:
-            selected_quotes = emotion_quotes
-        else:
-            selected_quotes = emotion_quotes.sample(n=top_k, random_state=42)
-        results = []
-        for _, quote in selected_quotes.iterrows():
-            results.append({
-                'text': quote['quote'] if 'quote' in quote else quote['text'],
-                'author': quote.get('author', 'Unknown'),
-                'emotion': emotion
-            })
-        return results
+        return emotion_quotes.index.to_numpy(dtype=np.intp)
     
     def _filter_quotes_by_length(self, quotes_df, max_words=50):
         """Filter quotes to only include those with max_words or less"""
         if quotes_df is None or quotes_df.empty:
             return quotes_df
         
-        # Count words in each quote
-        def word_count(text):
-            if pd.isna(text) or not isinstance(text, str):
-                return 0
-            return len(text.split())
-        
-        # Filter quotes by word count
-        filtered_quotes = quotes_df[quotes_df['quote'].apply(word_count) <= max_words]
+        # Word counts are precomputed in load_models
+        filtered_quotes = quotes_df[quotes_df['_word_count'] <= max_words]
         
         logger.info(f"📏 Filtered quotes: {len(quotes_df)} -> {len(filtered_quotes)} (max {max_words} words)")
         return filtered_quotes
 
+    def _warmup(self):
+        """Run one request per emotion so first-call costs are paid at startup"""
+        for emotion in self.emotions:
+            user_input = f"I feel {emotion}"
+            self.score_emotion(user_input)
+            self.get_recommendations(user_input, 5)
+        self.get_recommendations_batch([f"I feel {emotion}" for emotion in self.emotions], 5)
+
 # Initialize the trained quote engine
+# Quotes load lazily on first use; wsgi.py and __main__ start the load up front
 trained_engine = TrainedQuoteEngine()
 
-# Try to load trained models
-if trained_engine.load_models():
-    logger.info("✅ Trained models loaded successfully")
-else:
-    logger.warning("⚠️ Could not load trained models, using fallback mode")
-
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    # Read the backing table directly so health checks never trigger the lazy load
+    quotes_df = trained_engine._quotes_df
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'engine_loaded': trained_engine.is_loaded,
         'processing_method': 'simple_keyword_engine',
         'models_available': {
-            'quotes_df': trained_engine.quotes_df is not None
+            'quotes_df': quotes_df is not None
         },
         'dataset_info': {
-            'total_quotes': len(trained_engine.quotes_df) if trained_engine.quotes_df is not None else 0,
+            'total_quotes': len(quotes_df) if quotes_df is not None else 0,
             'emotion_classes': len(trained_engine.emotions) if hasattr(trained_engine, 'emotions') else 0
         }
     })
@@ -253,21 +415,22 @@ def get_recommendations():
         
         logger.info(f"🎯 Processing request: '{user_input[:100]}...'")
         
-        # Analyze sentiment using simple training model
-        emotion = trained_engine.detect_emotion(user_input)
+        # Analyze sentiment and context once; both steps below reuse it
+        analysis = trained_engine.analyze_input(user_input)
+        emotion, confidence, emotion_probabilities = trained_engine.score_emotion(user_input, analysis)
         
         # Get recommendations using simple training models
-        recommendations = trained_engine.get_recommendations(user_input, 5)
+        recommendations = trained_engine.get_recommendations(user_input, 5, analysis=analysis)
         
         # Format response
         response = {
             'status': 'success',
             'input_text': user_input,
-            'insight': "I understand what you're going through. You're not alone in this journey.",
+            'insight': DEFAULT_INSIGHT,
             'recommended_quotes': recommendations,
             'emotion_detected': emotion,
-            'confidence': 0.7, # Placeholder confidence
-            'emotion_probabilities': {}, # Placeholder probabilities
+            'confidence': confidence,
+            'emotion_probabilities': emotion_probabilities,
             'processing_method': 'simple_training_ml_engine',
             'timestamp': datetime.now().isoformat()
         }
@@ -275,6 +438,11 @@ def get_recommendations():
         logger.info(f"✅ Generated {len(recommendations)} recommendations for emotion: {emotion}")
         return jsonify(response)
         
+    except RequestEntityTooLarge:
+        return jsonify({
+            'error': f'Request body may be at most {MAX_REQUEST_BYTES} bytes',
+            'status': 'error'
+        }), 413
     except Exception as e:
         logger.error(f"❌ Error processing recommendation request: {e}")
         return jsonify({
@@ -282,31 +450,66 @@ def get_recommendations():
             'status': 'error'
         }), 500
 
+@app.route('/recommendations/batch', methods=['POST'])
+def get_recommendations_batch():
+    """Get quote recommendations for a list of texts in one request"""
+    try:
+        data = request.get_json()
+        texts = data.get('texts') if isinstance(data, dict) else None
+        
+        if not isinstance(texts, list) or not texts or not all(isinstance(text, str) and text.strip() for text in texts):
+            return jsonify({
+                'error': 'texts must be a non-empty list of non-empty strings',
+                'status': 'error'
+            }), 400
+        if len(texts) > MAX_BATCH_SIZE:
+            return jsonify({
+                'error': f'texts may contain at most {MAX_BATCH_SIZE} items',
+                'status': 'error'
+            }), 400
+        texts = [text.strip() for text in texts]
+        
+        logger.info(f"🎯 Processing batch request: {len(texts)} texts")
+        
+        results = []
+        for text, (emotion, recs) in zip(texts, trained_engine.get_recommendations_batch(texts, 5)):
+            results.append({
+                'input_text': text,
+                'recommended_quotes': recs,
+                'emotion_detected': emotion
+            })
+        
+        return jsonify({
+            'status': 'success',
+            'results': results,
+            'processing_method': 'simple_training_ml_engine',
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except RequestEntityTooLarge:
+        return jsonify({
+            'error': f'Request body may be at most {MAX_REQUEST_BYTES} bytes',
+            'status': 'error'
+        }), 413
+    except Exception as e:
+        logger.error(f"❌ Error processing batch recommendation request: {e}")
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
 @app.route('/quotes', methods=['GET'])
 def get_quotes():
     """Get all available quotes"""
     try:
-        if trained_engine.quotes_df is None:
+        if not trained_engine.ensure_loaded():
             return jsonify({
                 'error': 'Quote database not available',
                 'status': 'error'
             }), 500
         
-        # Return a sample of quotes
-        sample_size = min(100, len(trained_engine.quotes_df))
-        sample_quotes = trained_engine.quotes_df.sample(n=sample_size)
-        
-        # Filter quotes by length
-        filtered_quotes = trained_engine._filter_quotes_by_length(sample_quotes)
-        
-        quotes = []
-        for _, quote in filtered_quotes.iterrows():
-            quote_dict = {
-                'text': quote['quote'] if 'quote' in quote else quote['text'],
-                'author': quote.get('author', 'Unknown'),
-                'emotion': quote.get('assigned_emotion', quote.get('emotion', 'general'))
-            }
-            quotes.append(quote_dict)
+        # Return a sample of quotes, filtered by length
+        quotes = trained_engine.sample_quotes(100)
         
         response = {
             'status': 'success',
@@ -328,21 +531,13 @@ def get_quotes():
 def get_emotions():
     """Get available emotion categories"""
     try:
-        if trained_engine.emotion_classifier is None:
-            return jsonify({
-                'error': 'Emotion classifier not available',
-                'status': 'error'
-            }), 500
-        
-        # Get emotion classes from the trained classifier
-        emotion_classes = list(trained_engine.emotion_classifier.classes_)
+        # Emotion classes come from the keyword engine
+        emotion_classes = list(trained_engine.emotions)
         
-        # Get quote counts for each emotion
+        # Quote counts for each emotion are precomputed at load
         emotion_counts = {}
-        if trained_engine.quotes_df is not None and 'assigned_emotion' in trained_engine.quotes_df.columns:
-            for emotion in emotion_classes:
-                count = len(trained_engine.quotes_df[trained_engine.quotes_df['assigned_emotion'] == emotion])
-                emotion_counts[emotion] = count
+        if trained_engine.ensure_loaded():
+            emotion_counts = {emotion: trained_engine._emotion_counts.get(emotion, 0) for emotion in emotion_classes}
         
         return jsonify({
             'status': 'success',
@@ -363,23 +558,17 @@ if __name__ == '__main__':
     logger.info("🚀 Starting Trained WiseAI API Server...")
     logger.info("📱 API endpoints:")
     logger.info("   - POST /recommendations - Get personalized quotes")
+    logger.info("   - POST /recommendations/batch - Get personalized quotes for a list of texts")
     logger.info("   - GET  /quotes - Get all quotes")
     logger.info("   - GET  /emotions - Get emotion categories")
     logger.info("   - GET  /health - Health check")
     
-    if trained_engine.is_loaded:
-        logger.info("🤖 Using trained machine learning models")
-        logger.info(f"📊 Dataset size: {len(trained_engine.quotes_df)} quotes")
-        # Remove or update the following line since emotion_classifier is not used anymore
-        # logger.info(f"🎯 Emotion classes: {len(trained_engine.emotion_classifier.classes_)}")
-        logger.info(f"🎯 Emotion classes: {len(trained_engine.emotions)}")
-        if hasattr(trained_engine, 'quote_clusters') and trained_engine.quote_clusters is not None:
-            logger.info(f"📈 Quote clusters: {trained_engine.quote_clusters.n_clusters}")
-        else:
-            logger.info("📈 Quote clusters: Not available (using fallback)")
-    else:
-        logger.info("⚠️ Using fallback mode (no trained models)")
+    # Load the quotes in the background so the server starts listening right away
+    threading.Thread(target=trained_engine.ensure_loaded, daemon=True).start()
     
     logger.info("🌐 Server will be available at: http://localhost:5008")
+    logger.info("🏭 For production use a WSGI server: gunicorn -c gunicorn_conf.py")
     
-    app.run(host='0.0.0.0', port=5008, debug=True) 
\ No newline at end of file
+    # The reloader and debugger are opt-in; they slow every request
+    debug = os.environ.get('WISEAI_DEBUG', '').lower() in ('1', 'true')
+    app.run(host='0.0.0.0', port=5008, debug=debug)
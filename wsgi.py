@@ -0,0 +1,16 @@
+"""
+WSGI entry point for the WiseAI API server
+Loads the quotes eagerly at import; with gunicorn --preload that happens once
+in the master and the workers share it copy-on-write. Start gunicorn with
+-c gunicorn_conf.py, whose post_fork hook reseeds each worker's sampling RNG;
+plain --preload workers would all inherit the master's RNG state
+
+    gunicorn -c gunicorn_conf.py
+    gunicorn -c gunicorn_conf.py -w 4 -k gevent
+"""
+
+from trained_api_server import app, trained_engine
+
+trained_engine.ensure_loaded()
+
+__all__ = ['app', 'trained_engine']